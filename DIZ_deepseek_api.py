@@ -2,9 +2,13 @@
 # * Import
 # **************************************************************************
 import os
-import json
-import requests
 import time
+import orjson
+import asyncio
+import hashlib
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 import streamlit as st
 import uuid  # Add import for UUID generation
@@ -17,29 +21,81 @@ API_BASE = "https://ki-plattform.diz-ag.med.ovgu.de/api/"
 MODEL = "llama3.2-vision:90b"
 PROVIDER = "DeepSeek"
 API_KEY_FILE = "api_key.txt"  # File to store the API key
+CACHE_TTL = 3600  # Seconds a cached API response stays valid, in memory and on disk
+# Optional directory for caching API responses on disk. The responses contain patient-derived
+# text in plaintext, so the disk cache is off unless DIZ_LLM_CACHE_DIR is set. Entries older than
+# CACHE_TTL are ignored and deleted on the next lookup; the directory is otherwise not pruned.
+LLM_CACHE_DIR = Path(os.environ["DIZ_LLM_CACHE_DIR"]) if os.environ.get("DIZ_LLM_CACHE_DIR") else None
+MAX_RETRIES = 8  # Retries with exponential backoff for failed API requests
 
 # **************************************************************************
 # * Function
 # **************************************************************************
-def request_DIZ_deepseek(prompt: str, api_key: str, system_msg: str = "") -> str:
+class EmptyResponseError(Exception):
+    """The API answered without any message content; raised so that the reply is never cached."""
+
+@st.cache_resource
+def _session() -> requests.Session:
+    """Return a pooled HTTP session shared across Streamlit reruns so TLS connections are reused."""
+    session = requests.Session()
+    session.headers.update({"Content-Type": "application/json"})
+    # Retry failed requests with exponential backoff (1s, 2s, 4s, ...), honouring Retry-After
+    retries = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=8, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _cache_file(prompt: str, system_msg: str) -> Path:
+    """Return the on-disk cache location of the response for the given model, system message and prompt."""
+    key = hashlib.sha256("\0".join((MODEL, system_msg, prompt)).encode("utf-8")).hexdigest()
+    return LLM_CACHE_DIR / f"{key}.txt"
+
+def _read_cached(cache_file: Path):
+    """Return the cached response if it is younger than CACHE_TTL, deleting expired entries."""
+    try:
+        if time.time() - cache_file.stat().st_mtime < CACHE_TTL:
+            return cache_file.read_text(encoding="utf-8")
+        cache_file.unlink()
+    except FileNotFoundError:
+        pass
+    return None
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _chat_completion(prompt: str, system_msg: str, _api_key: str) -> str:
     r"""
-    Send a prompt to DIZ API (DeepSeek) and return the response.
+    Send a single chat completion request to the DIZ API.
+
+    Responses are cached in memory for CACHE_TTL seconds, so identical prompts are only sent once,
+    and on disk for as long if DIZ_LLM_CACHE_DIR is set.
+    Failed requests and empty replies raise and are therefore never cached.
 
     Args:
         - prompt: The prompt to send to the API.
-        - api_key: API key provided by the user
-        - system_msg: Optional system message
+        - system_msg: System message
+        - _api_key: API key provided by the user (not part of the cache key)
 
     Returns:
-        The response from the API or error message.
+        The response content from the API.
     """
+    cache_file = _cache_file(prompt, system_msg) if LLM_CACHE_DIR is not None else None
+    if cache_file is not None:
+        cached = _read_cached(cache_file)
+        if cached is not None:
+            return cached
+
     # Define the endpoint for completions
     url = f"{API_BASE}chat/completions"
     
-    # Define headers with the user-provided API key
+    # Define headers with the user-provided API key (Content-Type is set on the session)
     headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
+        "Authorization": f"Bearer {_api_key}"
     }
     
     # Define the JSON data to be sent in the POST request
@@ -56,34 +112,60 @@ def request_DIZ_deepseek(prompt: str, api_key: str, system_msg: str = "") -> str
             }
         ]
     }
+    body = orjson.dumps(data)
 
-    max_retries = 8
-    retry_count = 0
-    wait_time = 1  # Start with 1 second
+    response = _session().post(url, headers=headers, data=body, timeout=30)
+    response.raise_for_status()  # Raise an exception for bad status codes
 
-    while retry_count <= max_retries:
-        try:
-            # Make the POST request using the requests library
-            # Add a space at the end of the user prompt
-            data["messages"][1]["content"] += " "
+    # Parse the response
+    result = orjson.loads(response.content)
+    content = result.get("choices", [{}])[0].get("message", {}).get("content")
+    if not content:
+        raise EmptyResponseError("No response content")
 
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+    if cache_file is not None:
+        LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(content, encoding="utf-8")
+    return content
 
+def request_DIZ_deepseek(prompt: str, api_key: str, system_msg: str = "") -> str:
+    r"""
+    Send a prompt to DIZ API (DeepSeek) and return the response.
 
-            response.raise_for_status()  # Raise an exception for bad status codes
-            
-            # Parse the response
-            result = response.json()
-            return result.get("choices", [{}])[0].get("message", {}).get("content", "No response content")
-        
-        except requests.exceptions.RequestException as e:
-            retry_count += 1
-            if retry_count > max_retries:
-                return f"Error connecting to the API after {max_retries} retries: {str(e)}"
-            
-            print(f"API request failed (attempt {retry_count}/{max_retries}). Retrying in {wait_time} seconds...")
-            time.sleep(wait_time)
-            wait_time *= 2  # Exponential backoff
+    Args:
+        - prompt: The prompt to send to the API.
+        - api_key: API key provided by the user
+        - system_msg: Optional system message
+
+    Returns:
+        The response from the API or error message.
+    """
+    try:
+        return _chat_completion(prompt, system_msg, api_key)
+    except EmptyResponseError as e:
+        return str(e)
+    except requests.exceptions.RetryError as e:
+        return f"Error connecting to the API after {MAX_RETRIES} retries: {str(e)}"
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        # e.g. 401/403 from raise_for_status or an unparsable body, neither of which is retried
+        return f"Error connecting to the API: {str(e)}"
+
+async def _arequest(prompt: str, api_key: str, system_msg: str = "") -> str:
+    """Run `request_DIZ_deepseek` in a worker thread so that independent prompts can be awaited together."""
+    return await asyncio.to_thread(request_DIZ_deepseek, prompt, api_key, system_msg)
+
+async def request_DIZ_deepseek_many(prompts: list, api_key: str) -> list:
+    r"""
+    Send several independent prompts to the DIZ API concurrently.
+
+    Args:
+        - prompts: List of (prompt, system_msg) pairs.
+        - api_key: API key provided by the user
+
+    Returns:
+        The responses in the same order as `prompts`.
+    """
+    return await asyncio.gather(*(_arequest(prompt, api_key, system_msg) for prompt, system_msg in prompts))
 
 def save_api_key(api_key: str):
     """Save the API key to a local file."""
@@ -150,21 +232,20 @@ if __name__ == '__main__':
         # Add a process button
         if st.button("Process Text"):
             if api_key and user_input:
-                grammar_response = request_DIZ_deepseek("hello", api_key, " ")
+                grammar_system = "Sie sind Experte für deutsche Grammatik. Ihre Aufgabe besteht darin, Grammatikfehler im Text zu korrigieren, ohne die Bedeutung zu verändern. Entfernen Sie keine Informationen. Behalten Sie alles Unwichtige bei, egal ob Sie es für wichtig halten oder nicht."
+                summary_system = "Sie sind Experte für Nuklearmedizin und Radiologie. Sollten Sie in sich widersprüchliche oder irrelevante Informationen finden, beschreiben Sie diese bitte."
 
-                with st.spinner("Processing grammar correction..."):
-                    # First get and display grammar correction
-                    grammar_system = "Sie sind Experte für deutsche Grammatik. Ihre Aufgabe besteht darin, Grammatikfehler im Text zu korrigieren, ohne die Bedeutung zu verändern. Entfernen Sie keine Informationen. Behalten Sie alles Unwichtige bei, egal ob Sie es für wichtig halten oder nicht."
-                    grammar_response = request_DIZ_deepseek(user_input, api_key, grammar_system)
+                with st.spinner("Processing grammar correction and inconsistencies analysis..."):
+                    # Both prompts are independent, so send them at the same time
+                    grammar_response, summary_response = asyncio.run(request_DIZ_deepseek_many(
+                        [(user_input, grammar_system), (user_input, summary_system)],
+                        api_key
+                    ))
                     st.session_state.grammar_response = grammar_response
                     # Store the initial grammar correction before user edits
                     st.session_state.initial_grammar_correction = grammar_response
                     st.session_state.last_input = user_input
-                
-                with st.spinner("Processing inconsistencies analysis..."):
-                    # Then get and display inconsistencies
-                    summary_system = "Sie sind Experte für Nuklearmedizin und Radiologie. Sollten Sie in sich widersprüchliche oder irrelevante Informationen finden, beschreiben Sie diese bitte."
-                    st.session_state.summary_response = request_DIZ_deepseek(user_input, api_key, summary_system)
+                    st.session_state.summary_response = summary_response
                 
                 st.success("Processing complete!")
             else:
@@ -188,17 +269,14 @@ if __name__ == '__main__':
                     # Generate a UUID4 for the filename
                     filename = f"{uuid.uuid4()}.json"
                     
-                    # Create a dictionary with all required fields
-                    data = {
+                    # Serialize all required fields into one buffer and save it with a single write
+                    payload = orjson.dumps({
                         "input_text": st.session_state.last_input,
                         "initial_grammar_correction": st.session_state.initial_grammar_correction,
                         "user_corrected_text": grammar_text,
                         "inconsistencies": st.session_state.summary_response
-                    }
-                    
-                    # Save as JSON file
-                    with open(filename, "w", encoding="utf-8") as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
+                    }, option=orjson.OPT_INDENT_2)
+                    Path(filename).write_bytes(payload)
                     
                     st.success(f"Text saved to {filename}")
                 except Exception as e:
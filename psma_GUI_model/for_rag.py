@@ -1,4 +1,8 @@
 import os
+import math
+import functools
+import faiss
+import torch
 import pandas as pd
 from typing import List, Dict, Any, Optional, Literal
 import hashlib
@@ -7,20 +11,87 @@ from langchain.schema.output_parser import StrOutputParser
 from langchain.schema.runnable import RunnablePassthrough
 from langchain.schema import Document
 from langchain_community.vectorstores import FAISS, Chroma
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import LLMChainExtractor
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.chains import RetrievalQA
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_ollama import OllamaLLM
+from langchain_ollama import OllamaLLM, OllamaEmbeddings
 import langchain_ollama
 from transformers import pipeline
+from rag_data import RAG_DATA_DIR, ensure_directories, get_data_hash, get_data_content_hash, load_and_process_csv_cached
 
 RAGType = Literal["no_rag", "simple_vector", "contextual_compression", "hybrid"]
 
+HYBRID_EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
+IVFPQ_MIN_VECTORS = 5000  # Below this size exhaustive search is fast enough
+
+
+@functools.lru_cache(maxsize=4)
+def get_hf_embeddings(model_name: str) -> HuggingFaceEmbeddings:
+    """Load a HuggingFace embedding model once per process, on the GPU when available."""
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
+        encode_kwargs={"batch_size": 128, "normalize_embeddings": True, "convert_to_numpy": True}
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def get_ollama_llm(model_name: str) -> OllamaLLM:
+    """Create the Ollama client for a model once per process."""
+    return OllamaLLM(model=model_name, request_timeout=420)
+
+
+@functools.lru_cache(maxsize=4)
+def get_llm_compressor(model_name: str) -> LLMChainExtractor:
+    """Create the contextual compression extractor for a model once per process."""
+    return LLMChainExtractor.from_llm(get_ollama_llm(model_name))
+
+
+def quantize_faiss_index(vector_db: FAISS) -> FAISS:
+    """Replace the flat FAISS index with an IVF+PQ index once the corpus is large enough."""
+    flat_index = vector_db.index
+    if flat_index.ntotal <= IVFPQ_MIN_VECTORS or flat_index.d % 64 != 0:
+        return vector_db
+    
+    # Reuse the stored vectors instead of embedding the documents again
+    vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+    nlist = int(math.sqrt(flat_index.ntotal))
+    index = faiss.index_factory(flat_index.d, f"IVF{nlist},PQ64x8", flat_index.metric_type)
+    index.train(vectors)
+    index.add(vectors)
+    index.nprobe = max(1, nlist // 8)
+    
+    vector_db.index = index
+    return vector_db
+
+
+def index_is_current(hash_file: str, data_hash: str) -> bool:
+    """
+    Check whether the index stored next to hash_file was built from the current CSV data.
+    The cheap size:mtime fingerprint is compared first; only when it differs (e.g. the file was
+    touched or copied) is the content hashed, and a matching content hash keeps the index.
+    """
+    if not os.path.exists(hash_file):
+        return False
+    with open(hash_file, 'r') as f:
+        stored = f.read().split()
+    if stored and stored[0] == data_hash:
+        return True
+    if len(stored) < 2 or stored[1] != get_data_content_hash():
+        return False
+    # Same content under a new fingerprint: remember the fingerprint so the file is not hashed again
+    save_data_hash(hash_file, data_hash)
+    return True
+
+
+def save_data_hash(hash_file: str, data_hash: str):
+    """Store the fingerprint and content hash of the CSV data the index was built from."""
+    with open(hash_file, 'w') as f:
+        f.write(f"{data_hash}\n{get_data_content_hash()}")
+
 
 def initialize_rag_architecture(rag_type: RAGType, model_name: str) -> Optional[Any]:
     """Initialize the specified RAG architecture."""
@@ -35,14 +106,9 @@ def initialize_rag_architecture(rag_type: RAGType, model_name: str) -> Optional[
     rag_dir = os.path.join(RAG_DATA_DIR, rag_type)
     hash_file = os.path.join(rag_dir, "data_hash.txt")
     
-    needs_processing = True
-    if os.path.exists(hash_file):
-        with open(hash_file, 'r') as f:
-            stored_hash = f.read().strip()
-            if stored_hash == data_hash:
-                needs_processing = False
+    needs_processing = not index_is_current(hash_file, data_hash)
     
-    # Initialize embeddings
+    # Initialize embeddings (langchain_ollama embeds a whole list of chunks in one /api/embed request)
     embeddings = OllamaEmbeddings(model=model_name)
     
     if rag_type == "simple_vector":
@@ -53,13 +119,12 @@ def initialize_rag_architecture(rag_type: RAGType, model_name: str) -> Optional[
             return FAISS.load_local(vector_db_path, embeddings)
         
         print("Creating new FAISS index...")
-        documents = load_and_process_csv()
-        vector_db = FAISS.from_documents(documents, embeddings)
+        documents = load_and_process_csv_cached(data_hash)
+        vector_db = quantize_faiss_index(FAISS.from_documents(documents, embeddings))
         vector_db.save_local(vector_db_path)
         
         # Save hash
-        with open(hash_file, 'w') as f:
-            f.write(data_hash)
+        save_data_hash(hash_file, data_hash)
             
         return vector_db
     
@@ -69,8 +134,7 @@ def initialize_rag_architecture(rag_type: RAGType, model_name: str) -> Optional[
         if not needs_processing and os.path.exists(vector_db_path):
             print("Loading existing Chroma database...")
             vector_db = Chroma(persist_directory=vector_db_path, embedding_function=embeddings)
-            llm = OllamaLLM(model=model_name)
-            compressor = LLMChainExtractor.from_llm(llm)
+            compressor = get_llm_compressor(model_name)
             retriever = vector_db.as_retriever()
             compression_retriever = ContextualCompressionRetriever(
                 base_retriever=retriever,
@@ -79,7 +143,7 @@ def initialize_rag_architecture(rag_type: RAGType, model_name: str) -> Optional[
             return compression_retriever
             
         print("Creating new Chroma database...")
-        documents = load_and_process_csv()
+        documents = load_and_process_csv_cached(data_hash)
         vector_db = Chroma.from_documents(
             documents=documents,
             embedding=embeddings,
@@ -87,12 +151,10 @@ def initialize_rag_architecture(rag_type: RAGType, model_name: str) -> Optional[
         )
         
         # Save hash
-        with open(hash_file, 'w') as f:
-            f.write(data_hash)
+        save_data_hash(hash_file, data_hash)
             
         # Create compression retriever
-        llm = OllamaLLM(model=model_name)
-        compressor = LLMChainExtractor.from_llm(llm)
+        compressor = get_llm_compressor(model_name)
         retriever = vector_db.as_retriever()
         compression_retriever = ContextualCompressionRetriever(
             base_retriever=retriever,
@@ -106,24 +168,19 @@ def initialize_rag_architecture(rag_type: RAGType, model_name: str) -> Optional[
         if not needs_processing and os.path.exists(vector_db_path):
             print("Loading existing hybrid database...")
             # For hybrid, we use HuggingFace embeddings for better performance
-            hf_embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-mpnet-base-v2"
-            )
+            hf_embeddings = get_hf_embeddings(HYBRID_EMBEDDING_MODEL)
             vector_db = FAISS.load_local(vector_db_path, hf_embeddings)
             return vector_db.as_retriever(search_kwargs={"k": 5})
             
         print("Creating new hybrid database...")
         # For hybrid, we use HuggingFace embeddings for better performance
-        hf_embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-mpnet-base-v2"
-        )
-        documents = load_and_process_csv()
-        vector_db = FAISS.from_documents(documents, hf_embeddings)
+        hf_embeddings = get_hf_embeddings(HYBRID_EMBEDDING_MODEL)
+        documents = load_and_process_csv_cached(data_hash)
+        vector_db = quantize_faiss_index(FAISS.from_documents(documents, hf_embeddings))
         vector_db.save_local(vector_db_path)
         
         # Save hash
-        with open(hash_file, 'w') as f:
-            f.write(data_hash)
+        save_data_hash(hash_file, data_hash)
             
         return vector_db.as_retriever(search_kwargs={"k": 5})
     
@@ -1,40 +1,109 @@
 import os
+import re
 import torch
 import logging
+import functools
+import threading
 import traceback
-from typing import List, Dict, Any, Optional, Tuple
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Mapping, Optional, Tuple, Callable
 from transformers import AutoTokenizer, AutoModelForCausalLM
 from huggingface_hub import login
-from prompts import build_prompts
+from prompts import build_prompts, SYSTEM_PROMPT
+
+try:
+    from vllm import LLM, SamplingParams
+except ImportError:
+    # vLLM is optional; without it prompts are generated with HuggingFace generate()
+    LLM = None
+
+try:
+    from torchao.quantization import quantize_, int4_weight_only
+except ImportError:
+    # torchao is optional; without it HuggingFace models stay in half precision
+    quantize_ = None
+
+try:
+    from ollama_connect import get_llm_response_batched
+except ImportError:
+    # LangChain/Ollama are optional; without them prompts are only answered by the local model
+    get_llm_response_batched = None
+
+try:
+    import ahocorasick
+except ImportError:
+    # pyahocorasick is optional; without it responses are scanned once per pattern
+    ahocorasick = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# lru_cache alone lets concurrent first calls (Streamlit sessions, the extraction worker thread)
+# all run the load, so the loaders below are serialized; reentrant, as loaders call login_huggingface
+_MODEL_LOAD_LOCK = threading.RLock()
+
+def login_huggingface():
+    """Log in with the HuggingFace token, if present, to access gated models (once per process)"""
+    with _MODEL_LOAD_LOCK:
+        _login_huggingface()
+
+@functools.lru_cache(maxsize=1)
+def _login_huggingface():
+    token_path = "/workspaces/practical_radio_ai/hugging_face_key.txt"
+    if os.path.exists(token_path):
+        with open(token_path, "r") as file:
+            token = file.read().strip()
+            login(token=token)
+            logger.info("Successfully logged in with HuggingFace token")
+
+def prequantized_format(model_name: str) -> Optional[str]:
+    """Return the quantization format ("awq" or "gptq") of a prequantized checkpoint, judged by its name"""
+    name = model_name.lower()
+    for quant_format in ("awq", "gptq"):
+        if quant_format in name:
+            return quant_format
+    return None
+
 def load_huggingface_model(model_name: str, device: str = "cuda" if torch.cuda.is_available() else "cpu") -> Tuple[Any, Any]:
-    """Load model and tokenizer without event loop dependencies"""
+    """Load model and tokenizer without event loop dependencies, once per model"""
+    with _MODEL_LOAD_LOCK:
+        return _load_huggingface_model(model_name, device)
+
+@functools.lru_cache(maxsize=1)
+def _load_huggingface_model(model_name: str, device: str) -> Tuple[Any, Any]:
     logger.info(f"Loading model {model_name} on {device}")
     
     try:
-        # Load HuggingFace token for gated models
-        token_path = "/workspaces/practical_radio_ai/hugging_face_key.txt"
-        if os.path.exists(token_path):
-            with open(token_path, "r") as file:
-                token = file.read().strip()
-                login(token=token)
-                logger.info("Successfully logged in with HuggingFace token")
+        login_huggingface()
         
         # Load tokenizer with padding on left side
         tokenizer = AutoTokenizer.from_pretrained(model_name, padding_side="left")
         if tokenizer.pad_token is None:
             tokenizer.pad_token = tokenizer.eos_token
         
-        # Load model with appropriate configuration
+        # Prequantized AWQ/GPTQ checkpoints carry their own quantization config;
+        # other models get INT4 weight-only quantization on GPU when torchao is available
+        quantize_int4 = quantize_ is not None and device == "cuda" and prequantized_format(model_name) is None
+        
+        # Load model with appropriate configuration (torchao's INT4 kernels expect bfloat16)
         model = AutoModelForCausalLM.from_pretrained(
             model_name, 
             device_map=device,
-            torch_dtype=torch.float16
+            torch_dtype=torch.bfloat16 if quantize_int4 else torch.float16
         )
+        if quantize_int4:
+            # Decoding is bound by reading weights, so 4x smaller weights speed up every token
+            quantize_(model, int4_weight_only(group_size=128))
+            logger.info(f"Quantized {model_name} to INT4 weight-only")
+        
+        # Prequantized checkpoints run custom kernels that torch.compile cannot trace as one graph
+        if device == "cuda" and prequantized_format(model_name) is None:
+            # Static KV cache keeps tensor shapes fixed, so the compiled forward is captured once
+            # and replayed for every decoding step instead of launching each kernel from Python
+            model.generation_config.cache_implementation = "static"
+            model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=True)
         
         return model, tokenizer
         
@@ -43,14 +112,62 @@ def load_huggingface_model(model_name: str, device: str = "cuda" if torch.cuda.i
         logger.error(error_message)
         raise RuntimeError(error_message)
 
+def load_vllm_engine(model_name: str) -> Any:
+    """Load a vLLM engine once per model; prefix caching shares the KV blocks of common prompt prefixes"""
+    with _MODEL_LOAD_LOCK:
+        return _load_vllm_engine(model_name)
+
+@functools.lru_cache(maxsize=1)
+def _load_vllm_engine(model_name: str) -> Any:
+    logger.info(f"Loading vLLM engine for {model_name}")
+    login_huggingface()
+    return LLM(
+        model=model_name,
+        dtype="float16",
+        quantization=prequantized_format(model_name),
+        # FP8 KV cache halves cache memory, leaving room for more concurrent sequences
+        kv_cache_dtype="fp8",
+        calculate_kv_scales=True,
+        gpu_memory_utilization=0.9,
+        enable_prefix_caching=True
+    )
+
+def generate_with_vllm(formatted_prompts: Dict[str, str], model_name: str) -> Dict[str, str]:
+    """Generate responses for all prompts in one continuously batched vLLM run"""
+    try:
+        llm = load_vllm_engine(model_name)
+    except Exception as e:
+        logger.error(f"Failed to load model: {str(e)}")
+        return {key: f"ERROR: Model loading failed: {str(e)}" for key in formatted_prompts}
+    
+    keys = list(formatted_prompts.keys())
+    try:
+        outputs = llm.generate(
+            [formatted_prompts[key] for key in keys],
+            SamplingParams(max_tokens=512, temperature=0.1)
+        )
+    except Exception as e:
+        error_message = f"Error processing prompts: {str(e)}\n{traceback.format_exc()}"
+        logger.error(error_message)
+        return {key: f"ERROR: {str(e)}" for key in keys}
+    
+    results = {}
+    for key, output in zip(keys, outputs):
+        # vLLM returns only the generated continuation, without the prompt
+        response = output.outputs[0].text.strip()
+        results[key] = response
+        logger.info(f"Processed {key}: Response length {len(response)}  response {response}")
+    return results
+
 def process_prompts_in_batches(
     user_input: str,
     prompt_keys: List[str],
     prompts_dict: Dict[str, Dict[str, Any]],
     model_name: str,
-    batch_size: int = 4
+    batch_size: int = 4,
+    progress_callback: Optional[Callable[[int, int], None]] = None
 ) -> Dict[str, str]:
-    """Process prompts in batches with fixed token length handling"""
+    """Process prompts in batches with fixed token length handling; progress_callback receives (done, total) prompts"""
     logger.info(f"Processing {len(prompt_keys)} prompts in batches of {batch_size}")
     
     # Filter valid prompts
@@ -59,6 +176,21 @@ def process_prompts_in_batches(
         logger.error(f"No valid prompts found in keys: {prompt_keys}")
         return {}
     
+    # Format all prompts once; the input is truncated once and shared by every prompt
+    max_input_length = 1024  # Reduce input length to avoid token overflow
+    truncated_input = user_input[:max_input_length] + "..." if len(user_input) > max_input_length else user_input
+    formatted_prompts = {}
+    for key in valid_prompt_keys:
+        system_prompt = prompts_dict[key].get("prompt", f"Analyze the following text for {key}.")
+        formatted_prompts[key] = f"<prompt>{system_prompt}</prompt>\n\n{truncated_input}"
+    
+    if LLM is not None:
+        # vLLM schedules all prompts itself, so skip the manual batching below
+        results = generate_with_vllm(formatted_prompts, model_name)
+        if progress_callback:
+            progress_callback(len(results), len(results))
+        return results
+    
     try:
         model, tokenizer = load_huggingface_model(model_name)
     except Exception as e:
@@ -66,151 +198,210 @@ def process_prompts_in_batches(
         return {key: f"ERROR: Model loading failed: {str(e)}" for key in valid_prompt_keys}
     
     results = {}
-    max_input_length = 1024  # Reduce input length to avoid token overflow
     
-    for i in range(0, len(valid_prompt_keys), batch_size):
-        batch_keys = valid_prompt_keys[i:i + batch_size]
-        logger.info(f"Processing batch {i//batch_size + 1}/{(len(valid_prompt_keys) + batch_size - 1)//batch_size}: {batch_keys}")
-        
-        batch_prompts = []
-        for key in batch_keys:
-            prompt_data = prompts_dict[key]
-            system_prompt = prompt_data.get("prompt", f"Analyze the following text for {key}.")
-            
-            # Format prompt and truncate input if needed
-            if len(user_input) > max_input_length:
-                truncated_input = user_input[:max_input_length] + "..."
-            else:
-                truncated_input = user_input
-                
-            formatted_prompt = f"<prompt>{system_prompt}</prompt>\n\n{truncated_input}"
-            batch_prompts.append(formatted_prompt)
-        
-        try:
-            inputs = tokenizer(batch_prompts, return_tensors="pt", padding=True, truncation=True, max_length=max_input_length)
-            inputs = {k: v.to(model.device) for k, v in inputs.items()}
+    # Tokenize all prompts in one pass and bucket them by length, so each batch is padded
+    # only to the length of its own longest prompt
+    all_encoded = tokenizer([formatted_prompts[key] for key in valid_prompt_keys], truncation=True, max_length=max_input_length)["input_ids"]
+    order = sorted(range(len(valid_prompt_keys)), key=lambda idx: len(all_encoded[idx]))
+    # A compiled model recompiles for every new input length, so round bucket lengths up to a few sizes
+    pad_to_multiple_of = 128 if model.generation_config.cache_implementation == "static" else None
+    
+    # Decoding runs on a worker thread, overlapping with generation of the next batch on the GPU
+    pending = []
+    with ThreadPoolExecutor(max_workers=1) as decoder:
+        for i in range(0, len(order), batch_size):
+            bucket = order[i:i + batch_size]
+            batch_keys = [valid_prompt_keys[idx] for idx in bucket]
+            logger.info(f"Processing batch {i//batch_size + 1}/{(len(order) + batch_size - 1)//batch_size}: {batch_keys}")
             
-            with torch.no_grad():
-                output_ids = model.generate(
-                    **inputs,
-                    max_new_tokens=512,
-                    do_sample=True,
-                    temperature=0.1,
-                    num_return_sequences=1,
-                    pad_token_id=tokenizer.pad_token_id
+            try:
+                inputs = tokenizer.pad(
+                    {"input_ids": [all_encoded[idx] for idx in bucket]},
+                    padding=True,
+                    pad_to_multiple_of=pad_to_multiple_of,
+                    return_tensors="pt"
                 )
+                inputs = {k: v.to(model.device) for k, v in inputs.items()}
+                
+                with torch.no_grad():
+                    output_ids = model.generate(
+                        **inputs,
+                        max_new_tokens=512,
+                        do_sample=True,
+                        temperature=0.1,
+                        num_return_sequences=1,
+                        pad_token_id=tokenizer.pad_token_id
+                    )
+                
+                # Decode only the generated continuation; the prompt occupies the first input_length tokens
+                input_length = inputs["input_ids"].shape[1]
+                generated_ids = output_ids[:, input_length:].cpu()
+                pending.append((batch_keys, decoder.submit(tokenizer.batch_decode, generated_ids, skip_special_tokens=True)))
+                    
+            except Exception as e:
+                error_message = f"Error processing batch: {str(e)}\n{traceback.format_exc()}"
+                logger.error(error_message)
+                for key in batch_keys:
+                    results[key] = f"ERROR: {str(e)}"
             
-            batch_responses = tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+            if progress_callback:
+                progress_callback(i + len(bucket), len(order))
+        
+        for batch_keys, decoded in pending:
+            try:
+                batch_responses = decoded.result()
+            except Exception as e:
+                logger.error(f"Error decoding batch: {str(e)}\n{traceback.format_exc()}")
+                for key in batch_keys:
+                    results[key] = f"ERROR: {str(e)}"
+                continue
             
-            for j, key in enumerate(batch_keys):
-                response = batch_responses[j]
-                if truncated_input in response:
-                    response = response.split(truncated_input)[-1].strip()
+            for key, response in zip(batch_keys, batch_responses):
+                response = response.strip()
                 results[key] = response
                 logger.info(f"Processed {key}: Response length {len(response)}  response {response}")
-                
-        except Exception as e:
-            error_message = f"Error processing batch: {str(e)}\n{traceback.format_exc()}"
-            logger.error(error_message)
-            for key in batch_keys:
-                results[key] = f"ERROR: {str(e)}"
     
-    return results
+    # Restore the original prompt order
+    return {key: results[key] for key in valid_prompt_keys}
 
 def apply_field_dependencies(form_values: Dict[str, Any], form_fields: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
     """Apply dependencies between fields based on current values."""
-    updated_fields = {}
-    for field_key, field_info in form_fields.items():
-        if isinstance(field_info, dict):
-            updated_fields[field_key] = field_info.copy()
-        else:
-            updated_fields[field_key] = field_info
-            
+    # Shallow copy only; a field is copied when its dependency actually disables it
+    updated_fields = dict(form_fields)
+    
     # Handle field dependencies
-    for field_key, field_info in updated_fields.items():
-        # Skip non-dict fields
-        if not isinstance(field_info, dict):
+    for field_key, field_info in form_fields.items():
+        # Skip non-dict fields and fields without dependency
+        if not isinstance(field_info, Mapping) or "dependency" not in field_info:
             continue
             
-        # Check for dependency
-        if "dependency" in field_info:
-            dep = field_info["dependency"]
-            dep_field = dep.get("field")
-            dep_value = dep.get("value")
-            
-            # Get the current value of the dependent field
-            current_value = form_values.get(dep_field)
-            
-            # Check if dependency is met
-            is_dependent = False
-            if current_value is not None:
-                if isinstance(dep_value, list):
-                    is_dependent = current_value not in dep_value
-                else:
-                    is_dependent = current_value != dep_value
-                    
-            # Update disabled state
-            if is_dependent:
-                field_info["disabled"] = True
+        dep = field_info["dependency"]
+        dep_field = dep.get("field")
+        dep_value = dep.get("value")
+        
+        # Get the current value of the dependent field
+        current_value = form_values.get(dep_field)
+        
+        # Check if dependency is met
+        is_dependent = False
+        if current_value is not None:
+            if isinstance(dep_value, list):
+                is_dependent = current_value not in dep_value
+            else:
+                is_dependent = current_value != dep_value
+                
+        # Update disabled state
+        if is_dependent:
+            updated_fields[field_key] = {**field_info, "disabled": True}
     
     return updated_fields
 
+def process_prompts_with_rag(
+    user_input: str,
+    prompt_keys: List[str],
+    prompts_dict: Dict[str, Dict[str, Any]],
+    model_name: str,
+    rag_type: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, str]:
+    """Answer all prompts with an Ollama model over the given RAG architecture, sent as one concurrent batch"""
+    if get_llm_response_batched is None:
+        raise RuntimeError(f"RAG type {rag_type} requires LangChain and langchain_ollama")
+    
+    valid_prompt_keys = [key for key in prompt_keys if key in prompts_dict]
+    logger.info(f"Processing {len(valid_prompt_keys)} prompts with Ollama model {model_name} ({rag_type})")
+    
+    # Every question already starts with the system prompt, which is sent once as the system message instead
+    responses = get_llm_response_batched(
+        [f"{prompts_dict[key]['question'].removeprefix(SYSTEM_PROMPT)}\n\n{user_input}" for key in valid_prompt_keys],
+        SYSTEM_PROMPT.strip(),
+        model_name,
+        rag_type
+    )
+    if progress_callback:
+        progress_callback(len(responses), len(responses))
+    # Failed requests are marked the way process_text_input expects
+    return {
+        key: f"ERROR: {response.removeprefix('Error: ')}" if response.startswith("Error: ") else response
+        for key, response in zip(valid_prompt_keys, responses)
+    }
+
 def process_text_input(
     user_input: str,
     field_info_dict: Dict[str, Dict[str, Any]],
     model_name: str,
-    batch_size: int = 4
+    batch_size: int = 4,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    rag_type: str = "no_rag"
 ) -> Dict[str, Dict[str, Any]]:
-    """Main function to process text input and update observables"""
-    from prompts import build_prompts
-    
-    logger.info(f"Processing text input with model {model_name}, batch size {batch_size}")
+    """
+    Main function to process text input and update observables.
+    With rag_type other than "no_rag", model_name names an Ollama model answering over that RAG architecture.
+    """
+    logger.info(f"Processing text input with model {model_name}, batch size {batch_size}, RAG type {rag_type}")
     
-    # Group fields by prompt_key
-    prompt_groups = {}
+    # Flatten the field metadata into parallel lists in one pass, then group field indices by prompt_key
+    field_keys, field_prompt_keys, field_types, field_options = [], [], [], []
     for field_key, field_info in field_info_dict.items():
         prompt_key = field_info.get('prompt_key')
         if prompt_key:
-            if prompt_key not in prompt_groups:
-                prompt_groups[prompt_key] = []
-            prompt_groups[prompt_key].append((field_key, field_info))
+            field_keys.append(field_key)
+            field_prompt_keys.append(prompt_key)
+            field_types.append(field_info.get('type', 'text'))
+            field_options.append(field_info.get('options', []))
+    
+    prompt_groups = defaultdict(list)
+    for idx, prompt_key in enumerate(field_prompt_keys):
+        prompt_groups[prompt_key].append(idx)
     
     unique_prompt_keys = list(prompt_groups.keys())
     
     # Process prompts
-    prompt_responses = process_prompts_in_batches(
-        user_input,
-        unique_prompt_keys,
-        build_prompts(),
-        model_name,
-        batch_size
-    )
+    if rag_type != "no_rag":
+        prompt_responses = process_prompts_with_rag(
+            user_input,
+            unique_prompt_keys,
+            build_prompts(),
+            model_name,
+            rag_type,
+            progress_callback
+        )
+    else:
+        prompt_responses = process_prompts_in_batches(
+            user_input,
+            unique_prompt_keys,
+            build_prompts(),
+            model_name,
+            batch_size,
+            progress_callback
+        )
     
     # Map responses to fields
     field_results = {}
     for prompt_key, response in prompt_responses.items():
-        fields = prompt_groups.get(prompt_key, [])
-        for field_key, field_info in fields:
-            field_results[field_key] = {
-                'field_key': field_key,
+        is_error = response.startswith("ERROR:")
+        for idx in prompt_groups.get(prompt_key, []):
+            field_results[field_keys[idx]] = {
+                'field_key': field_keys[idx],
                 'prompt_key': prompt_key,
                 'response': response,
-                'success': not response.startswith("ERROR:"),
-                'error': response if response.startswith("ERROR:") else None,
-                'field_type': field_info.get('type', 'text'),
-                'value': postprocess_response(response, field_info)
+                'success': not is_error,
+                'error': response if is_error else None,
+                'field_type': field_types[idx],
+                'value': parse_response_value(response, field_types[idx], field_options[idx])
             }
     
     return field_results
 
 def postprocess_response(response: str, field_info: Dict[str, Any]) -> Any:
     """Process response based on field type"""
-    field_type = field_info.get('type', 'text')
-    
+    return parse_response_value(response, field_info.get('type', 'text'), field_info.get('options', []))
+
+def parse_response_value(response: str, field_type: str, options: List[str]) -> Any:
+    """Process response based on an already extracted field type and options"""
     if field_type == 'radio':
         return parse_yes_no(response) or "Unknown"
     elif field_type == 'multiselect':
-        options = field_info.get('options', [])
         return parse_list_values(response, options)
     elif field_type == 'number':
         return parse_number(response) or 0.0
@@ -219,27 +410,50 @@ def postprocess_response(response: str, field_info: Dict[str, Any]) -> Any:
     
     return response.strip() if response else ""
 
+NUMBER_PATTERN = re.compile(r'[-+]?\d*\.?\d+')
+DATE_PATTERNS = (
+    re.compile(r'(\d{4})[/.-](\d{1,2})[/.-](\d{1,2})'),
+    re.compile(r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})')
+)
+
+# Whole words only, so that e.g. "nose" or "notable" do not count as "no". The first yes or no
+# word wins (group 1: no, group 2: yes); "not present" is listed before "not" so it is read whole
+YES_NO_PATTERN = re.compile(
+    r'\b(?:(not present|no|not|none|negative|absent|false)|(yes|positive|present|confirmed|true))\b',
+    re.IGNORECASE
+)
+
+@functools.lru_cache(maxsize=256)
+def build_automaton(tagged_patterns: Tuple[Tuple[str, str], ...]) -> Any:
+    """Build an Aho-Corasick automaton matching all lowercase patterns in one pass; each pattern yields its tag"""
+    automaton = ahocorasick.Automaton()
+    for pattern, tag in tagged_patterns:
+        automaton.add_word(pattern, tag)
+    automaton.make_automaton()
+    return automaton
+
+def find_tags(response_lower: str, tagged_patterns: Tuple[Tuple[str, str], ...]) -> set:
+    """Return the tags of all patterns occurring in the lowercase response"""
+    if ahocorasick is None:
+        return {tag for pattern, tag in tagged_patterns if pattern in response_lower}
+    return {tag for _, tag in build_automaton(tagged_patterns).iter(response_lower)}
+
 def parse_yes_no(response: str) -> Optional[str]:
     """Parse Yes/No response"""
-    response_lower = response.lower()
-    yes_patterns = ['yes', 'positive', 'present', 'confirmed', 'true']
-    no_patterns = ['no', 'negative', 'absent', 'not present', 'false']
-    
-    if any(p in response_lower for p in yes_patterns):
-        return 'Yes'
-    if any(p in response_lower for p in no_patterns):
-        return 'No'
-    return None
+    match = YES_NO_PATTERN.search(response)
+    if match is None:
+        return None
+    return 'No' if match.group(1) else 'Yes'
 
 def parse_list_values(response: str, valid_options: List[str]) -> List[str]:
     """Parse list values from response"""
-    response_lower = response.lower()
-    return [opt for opt in valid_options if opt.lower() in response_lower]
+    # Options are matched by their lowercase form, which is also the tag
+    found = find_tags(response.lower(), tuple((opt.lower(), opt.lower()) for opt in valid_options))
+    return [opt for opt in valid_options if opt.lower() in found]
 
 def parse_number(response: str) -> Optional[float]:
     """Parse number from response"""
-    import re
-    match = re.search(r'[-+]?\d*\.?\d+', response)
+    match = NUMBER_PATTERN.search(response)
     try:
         return float(match.group(0)) if match else None
     except (ValueError, AttributeError):
@@ -247,14 +461,8 @@ def parse_number(response: str) -> Optional[float]:
 
 def parse_date(response: str) -> Optional[str]:
     """Parse date from response"""
-    import re
-    date_patterns = [
-        r'(\d{4})[/.-](\d{1,2})[/.-](\d{1,2})',
-        r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})'
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, response)
+    for pattern in DATE_PATTERNS:
+        match = pattern.search(response)
         if match:
             return match.group(0)
     return None
\ No newline at end of file
@@ -0,0 +1,67 @@
+import os
+import functools
+import hashlib
+from typing import List
+import pandas as pd
+from langchain.schema import Document
+from langchain.text_splitter import TokenTextSplitter
+
+# CSV data shared by the RAG architectures (for_rag) and the chains built on them (ollama_connect)
+
+# Base directories for storing processed data
+RAG_DATA_DIR = os.path.join(os.path.dirname(__file__), "../data/processed_rag_data")
+CSV_FILE_PATH = os.path.join(os.path.dirname(__file__), "../data/PSMA data.csv")
+
+# Token based splitter backed by tiktoken's C tokenizer, built once at import
+# (256 tokens / 50 overlap roughly matches the former 1000 / 200 character chunks)
+TEXT_SPLITTER = TokenTextSplitter(encoding_name="cl100k_base", chunk_size=256, chunk_overlap=50)
+
+def ensure_directories():
+    """Ensure all necessary directories exist."""
+    os.makedirs(RAG_DATA_DIR, exist_ok=True)
+    for rag_type in ["simple_vector", "contextual_compression", "hybrid"]:
+        os.makedirs(os.path.join(RAG_DATA_DIR, rag_type), exist_ok=True)
+
+def get_data_hash() -> str:
+    """Fingerprint the CSV file by size and modification time to detect changes without reading it."""
+    if not os.path.exists(CSV_FILE_PATH):
+        return "no_file"
+    
+    stat = os.stat(CSV_FILE_PATH)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def get_data_content_hash() -> str:
+    """Hash the CSV file content with BLAKE2b, streaming it in 1 MiB chunks instead of reading it whole."""
+    if not os.path.exists(CSV_FILE_PATH):
+        return "no_file"
+    
+    file_hash = hashlib.blake2b()
+    with open(CSV_FILE_PATH, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+def load_and_process_csv() -> List[Document]:
+    """Load and process CSV file into Document objects."""
+    # Parse with Arrow's multithreaded C++ reader and keep the columns Arrow-backed
+    df = pd.read_csv(CSV_FILE_PATH, engine="pyarrow", dtype_backend="pyarrow")
+    
+    # Build the "col: value " text of every row column by column with vectorized string ops,
+    # leaving out missing values; the trailing space of the last field is dropped afterwards
+    contents = pd.Series("", index=df.index, dtype=object)
+    for col in df.columns:
+        part = f"{col}: " + df[col].astype(str) + " "
+        contents = contents + part.where(df[col].notna(), "")
+    contents = contents.str[:-1]
+    
+    # Convert each row to a document
+    documents = [Document(page_content=content, metadata={"source": "PSMA_data.csv"}) for content in contents.tolist()]
+    
+    # Split documents into chunks
+    split_docs = TEXT_SPLITTER.split_documents(documents)
+    return split_docs
+
+@functools.lru_cache(maxsize=2)
+def load_and_process_csv_cached(data_hash: str) -> List[Document]:
+    """Load and split the CSV once per data fingerprint, shared by all RAG types."""
+    return load_and_process_csv()
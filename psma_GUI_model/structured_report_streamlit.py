@@ -1,20 +1,29 @@
 import streamlit as st
 import datetime
+import functools
+import io
 import json
 import re
-import time
 import traceback
 import os
-from typing import Dict, Any, List
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
 import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
 # Import from local modules
-from prompts import build_prompts
+from prompts import build_prompts, PROSTATE_LOCATIONS, PELVIC_LN_STATIONS, EXTRA_PELVIC_LN_STATIONS
 from main_text_input_process import process_text_input
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+CONFIG_PATH = os.environ.get("PSMA_CONFIG", "/workspaces/practical_radio_ai/psma_GUI_model/config.json")
+# rag_type other than "no_rag" answers the prompts with the Ollama model model_name over that RAG architecture
+DEFAULT_CONFIG = {"model_name": "ibm-granite/granite-3.2-8b-instruct-preview", "batch_size": 16, "rag_type": "no_rag"}
+
 # Initialize observable state
 if 'form_state' not in st.session_state:
     st.session_state.form_state = {}
@@ -23,18 +32,133 @@ def update_field_value(field_key: str, value: Any):
     """Update a field value in the form state"""
     st.session_state.form_state[field_key] = value
 
+def update_field_values(values: Dict[str, Any]):
+    """Update several field values in the form state at once"""
+    st.session_state.form_state.update(values)
+
 def get_field_value(field_key: str, default: Any = None) -> Any:
     """Get a field value from the form state"""
     return st.session_state.form_state.get(field_key, default)
 
 def on_field_change(field_key: str):
-    """Callback for field value changes"""
-    def callback():
-        widget_key = f"widget_{field_key}"
-        if widget_key in st.session_state:
-            value = st.session_state[widget_key]
-            update_field_value(field_key, value)
-    return callback
+    """Callback for field value changes; widgets pass their field key via args"""
+    widget_key = f"widget_{field_key}"
+    if widget_key in st.session_state:
+        value = st.session_state[widget_key]
+        update_field_value(field_key, value)
+
+def parse_iso_date(value: Any) -> Optional[datetime.date]:
+    """Return a date for a date or an ISO (YYYY-MM-DD) string, None for anything else"""
+    if isinstance(value, datetime.date):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+def render_text(field_key: str, field_info: Dict[str, Any], current_value: Any, enabled: bool):
+    """Render a single line text field"""
+    st.text_input(
+        field_info["label"],
+        value=current_value,
+        key=f"widget_{field_key}",
+        on_change=on_field_change,
+        args=(field_key,),
+        disabled=not enabled
+    )
+
+def render_text_area(field_key: str, field_info: Dict[str, Any], current_value: Any, enabled: bool):
+    """Render a multi line text field"""
+    st.text_area(
+        field_info["label"],
+        value=current_value,
+        key=f"widget_{field_key}",
+        height=150,
+        on_change=on_field_change,
+        args=(field_key,),
+        disabled=not enabled
+    )
+
+def render_number(field_key: str, field_info: Dict[str, Any], current_value: Any, enabled: bool):
+    """Render a number field"""
+    try:
+        value = float(current_value) if current_value is not None else 0.0
+    except (ValueError, TypeError):
+        value = 0.0
+        
+    st.number_input(
+        field_info["label"],
+        value=value,
+        key=f"widget_{field_key}",
+        on_change=on_field_change,
+        args=(field_key,),
+        disabled=not enabled
+    )
+
+def render_date(field_key: str, field_info: Dict[str, Any], current_value: Any, enabled: bool):
+    """Render a date field"""
+    st.date_input(
+        field_info["label"],
+        value=parse_iso_date(current_value),
+        key=f"widget_{field_key}",
+        on_change=on_field_change,
+        args=(field_key,),
+        disabled=not enabled
+    )
+
+def render_radio(field_key: str, field_info: Dict[str, Any], current_value: Any, enabled: bool):
+    """Render a radio button field"""
+    option_index = field_info["option_index"]
+    index = option_index.get(current_value)
+    if index is None:
+        index = option_index[field_info["default"]]
+        
+    st.radio(
+        field_info["label"],
+        options=field_info["options"],
+        index=index,
+        key=f"widget_{field_key}",
+        horizontal=True,
+        on_change=on_field_change,
+        args=(field_key,),
+        disabled=not enabled
+    )
+
+def render_multiselect(field_key: str, field_info: Dict[str, Any], current_value: Any, enabled: bool):
+    """Render a multiselect field"""
+    if current_value is None:
+        default = field_info["default"]
+    elif not isinstance(current_value, list):
+        default = [current_value] if current_value else []
+    else:
+        default = current_value
+        
+    # Ensure all values are in options
+    if default:
+        option_set = field_info["option_set"]
+        default = [v for v in default if v in option_set]
+    
+    st.multiselect(
+        label=field_info["label"],
+        options=field_info["options"],
+        default=default,
+        key=f"widget_{field_key}",
+        on_change=on_field_change,
+        args=(field_key,),
+        disabled=not enabled
+    )
+
+# Renderer for each field type
+FIELD_RENDERERS = {
+    "text": render_text,
+    "text_area": render_text_area,
+    "number": render_number,
+    "date": render_date,
+    "radio": render_radio,
+    "multiselect": render_multiselect
+}
 
 def render_field(field_key: str, field_info: Dict[str, Any], enabled: bool = True):
     """Render a form field using the observable pattern"""
@@ -42,97 +166,22 @@ def render_field(field_key: str, field_info: Dict[str, Any], enabled: bool = Tru
         return
     
     current_value = get_field_value(field_key, field_info.get("default"))
-    widget_key = f"widget_{field_key}"
-    
-    if field_info["type"] == "text":
-        st.text_input(
-            field_info["label"],
-            value=current_value,
-            key=widget_key,
-            on_change=on_field_change(field_key),
-            disabled=not enabled
-        )
-        
-    elif field_info["type"] == "text_area":
-        st.text_area(
-            field_info["label"],
-            value=current_value,
-            key=widget_key,
-            height=150,
-            on_change=on_field_change(field_key),
-            disabled=not enabled
-        )
-        
-    elif field_info["type"] == "number":
-        try:
-            value = float(current_value) if current_value is not None else 0.0
-        except (ValueError, TypeError):
-            value = 0.0
-            
-        st.number_input(
-            field_info["label"],
-            value=value,
-            key=widget_key,
-            on_change=on_field_change(field_key),
-            disabled=not enabled
-        )
-        
-    elif field_info["type"] == "date":
-        if isinstance(current_value, str) and current_value:
-            try:
-                value = datetime.datetime.strptime(current_value, "%Y-%m-%d").date()
-            except:
-                value = None
-        else:
-            value = current_value if current_value else None
-            
-        st.date_input(
-            field_info["label"],
-            value=value,
-            key=widget_key,
-            on_change=on_field_change(field_key),
-            disabled=not enabled
-        )
-        
-    elif field_info["type"] == "radio":
-        options = field_info["options"]
-        if current_value in options:
-            index = options.index(current_value)
-        else:
-            index = options.index(field_info["default"])
-            
-        st.radio(
-            field_info["label"],
-            options=options,
-            index=index,
-            key=widget_key,
-            horizontal=True,
-            on_change=on_field_change(field_key),
-            disabled=not enabled
-        )
-        
-    elif field_info["type"] == "multiselect":
-        if current_value is None:
-            default = field_info["default"]
-        elif not isinstance(current_value, list):
-            default = [current_value] if current_value else []
-        else:
-            default = current_value
-            
-        # Ensure all values are in options
-        default = [v for v in default if v in field_info["options"]]
-        
-        st.multiselect(
-            label=field_info["label"],
-            options=field_info["options"],
-            default=default,
-            key=widget_key,
-            on_change=on_field_change(field_key),
-            disabled=not enabled
-        )
+    renderer = FIELD_RENDERERS.get(field_info["type"])
+    if renderer is not None:
+        renderer(field_key, field_info, current_value, enabled)
 
-def check_field_dependencies(field_info: Dict[str, Any]) -> bool:
-    """Check if a field's dependencies are satisfied"""
+def format_list(value: List[Any]) -> str:
+    """Format the selected options of a multiselect field for the report"""
+    return ", ".join(map(str, value))
+
+# Report formatter for each field type; other types are formatted with str,
+# which also gives dates in ISO (YYYY-MM-DD) form
+FIELD_FORMATTERS = {
+    "multiselect": format_list
+}
+
+def check_field_dependencies(field_info: Dict[str, Any], form_state: Optional[Dict[str, Any]] = None) -> bool:
+    """Check if a field's dependencies are satisfied, against the given form state snapshot if any"""
     if "dependency" not in field_info:
         return True
         
@@ -140,7 +189,7 @@ def check_field_dependencies(field_info: Dict[str, Any]) -> bool:
     dep_field = dep.get("field")
     dep_value = dep.get("value")
     
-    current_value = get_field_value(dep_field)
+    current_value = get_field_value(dep_field) if form_state is None else form_state.get(dep_field)
     
     if current_value is None:
         return False
@@ -150,21 +199,88 @@ def check_field_dependencies(field_info: Dict[str, Any]) -> bool:
     
     return current_value == dep_value
 
+def group_fields_by_section(form_fields: Dict[str, Dict[str, Any]]) -> List[Tuple[str, List[Tuple[str, Dict[str, Any]]]]]:
+    """Group the fields by section in a single pass; returns (section, [(field_key, field_info), ...]) in form order"""
+    # Sections keep the order in which they first appear, i.e. the clinical reporting order of the form
+    section_fields = defaultdict(list)
+    for field_key, field_info in form_fields.items():
+        section_fields[field_info["section"]].append((field_key, field_info))
+    return list(section_fields.items())
+
+@functools.lru_cache(maxsize=1)
+def form_sections() -> List[Tuple[str, List[Tuple[str, Dict[str, Any]]]]]:
+    """Sections of the standard form fields, grouped once per process (shared, so do not modify)"""
+    return group_fields_by_section(initialize_form_fields())
+
+def sections_of(form_fields: Dict[str, Dict[str, Any]]) -> List[Tuple[str, List[Tuple[str, Dict[str, Any]]]]]:
+    """Return the fields grouped by section, reusing the cached grouping for the standard form fields"""
+    if form_fields is initialize_form_fields():
+        return form_sections()
+    return group_fields_by_section(form_fields)
+
+def enabled_fields(section_fields: List[Tuple[str, Dict[str, Any]]], form_state: Dict[str, Any],
+                   dependency_met: Dict[Tuple[str, Any], bool], hidden: set):
+    """
+    Yield the (field_key, field_info) pairs whose dependency is met.
+    Many fields depend on the same parent value, so each distinct dependency is evaluated once
+    and cached in dependency_met. Skipped fields are added to hidden, so their whole dependent
+    subtree (parents always precede their children in the form) is skipped without any check.
+    """
+    for field_key, field_info in section_fields:
+        dep = field_info.get("dependency")
+        if dep is not None:
+            if dep.get("field") in hidden:
+                hidden.add(field_key)
+                continue
+            dep_value = dep.get("value")
+            dep_key = (dep.get("field"), tuple(dep_value) if isinstance(dep_value, list) else dep_value)
+            enabled = dependency_met.get(dep_key)
+            if enabled is None:
+                enabled = dependency_met[dep_key] = check_field_dependencies(field_info, form_state)
+            if not enabled:
+                hidden.add(field_key)
+                continue
+        yield field_key, field_info
+
 def display_form(form_fields: Dict[str, Dict[str, Any]]):
     """Display the form using observable pattern"""
-    sections = set(field["section"] for field in form_fields.values())
+    form_state = st.session_state.form_state
+    dependency_met = {}
+    hidden = set()
     
-    for section in sorted(sections):
+    for section, section_fields in sections_of(form_fields):
         st.subheader(section)
         with st.expander(f"Expand {section}", expanded=(section == "Clinical History & Procedure")):
-            section_fields = {k: v for k, v in form_fields.items() if v["section"] == section}
-            
-            for field_key, field_info in section_fields.items():
-                enabled = check_field_dependencies(field_info)
-                render_field(field_key, field_info, enabled)
+            # Fields whose dependency is not met are not rendered at all, so they are skipped here
+            for field_key, field_info in enabled_fields(section_fields, form_state, dependency_met, hidden):
+                render_field(field_key, field_info)
                 
             st.markdown("---")
 
+@st.cache_data(show_spinner=False)
+def load_config(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse the config file; cached per modification time, so edits are picked up"""
+    with open(path, "r") as f:
+        return json.load(f)
+
+def get_config() -> Dict[str, Any]:
+    """Return the default config overridden by the values in the config file"""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        config.update(load_config(CONFIG_PATH, os.stat(CONFIG_PATH).st_mtime_ns))
+    except Exception as e:
+        logger.warning(f"Using default config: {str(e)}")
+    return config
+
+@st.cache_resource
+def generation_executor() -> ThreadPoolExecutor:
+    """
+    Single worker thread shared by all sessions, on which all model generation runs.
+    The cached model's compiled CUDA graphs are recorded on the thread that first runs it,
+    so generation must not move to a fresh thread on every click.
+    """
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="generation")
+
 def process_text():
     """Process text input and update form state"""
     # Get raw text
@@ -174,40 +290,41 @@ def process_text():
         return
     
     # Load config
-    config = {"model_name": "ibm-granite/granite-3.2-8b-instruct-preview", "batch_size": 1}
-    try:
-        with open("/workspaces/practical_radio_ai/psma_GUI_model/config.json", "r") as f:
-            config.update(json.load(f))
-    except Exception as e:
-        logger.warning(f"Using default config: {str(e)}")
+    config = get_config()
     
     # Initialize progress tracking
     progress_bar = st.session_state.get("progress_bar")
     progress_text = st.session_state.get("progress_text")
     
     try:
-        # Process text
+        # Run the model on the shared generation thread; the script thread keeps the progress widgets current
+        # from the (done, total) updates the worker posts after every generated batch
         form_fields = initialize_form_fields()
-        results = process_text_input(
+        progress_updates = queue.Queue()
+        future = generation_executor().submit(
+            process_text_input,
             raw_text,
             form_fields,
             config["model_name"],
-            config["batch_size"]
+            config["batch_size"],
+            lambda done, total: progress_updates.put((done, total)),
+            config["rag_type"]
         )
+        while True:
+            try:
+                done, total = progress_updates.get(timeout=0.1)
+            except queue.Empty:
+                if future.done():
+                    break
+                continue
+            if progress_bar:
+                progress_bar.progress(done / total)
+            if progress_text:
+                progress_text.text(f"Processed {done}/{total} prompts")
+        results = future.result()
         
         # Update form state with results
-        if results:
-            total = len(results)
-            for i, (field_key, result) in enumerate(results.items()):
-                if progress_bar:
-                    progress_bar.progress((i + 1) / total)
-                if progress_text:
-                    progress_text.text(f"Processing field {i+1}/{total}: {field_key}")
-                
-                if result["success"]:
-                    update_field_value(field_key, result["value"])
-                
-                time.sleep(0.05)  # Small delay for UI updates
+        update_field_values({field_key: result["value"] for field_key, result in results.items() if result["success"]})
         
         # Update progress
         if progress_bar:
@@ -222,14 +339,55 @@ def process_text():
         st.error(f"Error processing text: {str(e)}")
         logger.error(f"Error in process_text: {str(e)}\n{traceback.format_exc()}")
 
-def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
-    """Initialize form fields with their metadata"""
-    return {
+# Option sets shared by many fields; tuples so that a single object serves every field
+YES_NO_UNKNOWN = ("Yes", "No", "Unknown")
+
+def _lymph_node_fields(section: str, parent_field: str, stations: Tuple[Tuple[str, str], ...]) -> Dict[str, Dict[str, Any]]:
+    """
+    Build the lesion, size & SUVmax and notes fields of each lymph node station in a section.
+    The stations are those of prompts.py, so the prompt keys always match PROMPTS; the field keys
+    are derived from the station names (e.g. "Other Extra-pelvic LN" -> "other_extra_pelvic_ln").
+    """
+    fields = {}
+    for name, _ in stations:
+        node = re.sub(r"[ -]", "_", name.lower())
+        lesion_key = f"{node}_lesion"
+        fields[lesion_key] = {
+            "type": "radio",
+            "label": f"{name}: Lesion present?",
+            "options": YES_NO_UNKNOWN,
+            "default": "Unknown",
+            "section": section,
+            "prompt_key": f"{name} lesion",
+            "dependency": {"field": parent_field, "value": "Yes"}
+        }
+        fields[f"{node}_size_suv"] = {
+            "type": "text",
+            "label": "Size & SUVmax",
+            "default": "",
+            "section": section,
+            "prompt_key": f"{name} size and SUVmax",
+            "dependency": {"field": lesion_key, "value": "Yes"}
+        }
+        fields[f"{node}_notes"] = {
+            "type": "text",
+            "label": "Notes",
+            "default": "",
+            "section": section,
+            "prompt_key": f"{name} notes",
+            "dependency": {"field": lesion_key, "value": "Yes"}
+        }
+    return fields
+
+@functools.lru_cache(maxsize=1)
+def initialize_form_fields() -> Mapping[str, Mapping[str, Any]]:
+    """Initialize form fields with their metadata (built once per process and shared read-only)"""
+    fields = {
         # Clinical History & Procedure
         "indication_for_scan": {
             "type": "multiselect",
             "label": "Indication for the scan",
-            "options": ["Primary staging", "CRPC/Recurrent restaging", "PSMA expression assessment for PSMA targeted therapy"],
+            "options": ("Primary staging", "CRPC/Recurrent restaging", "PSMA expression assessment for PSMA targeted therapy"),
             "default": [],
             "section": "Clinical History & Procedure",
             "prompt_key": "Indication for the scan"
@@ -244,7 +402,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "radical_prostatectomy": {
             "type": "radio",
             "label": "Radical prostatectomy?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Clinical History & Procedure",
             "prompt_key": "Radical prostatectomy"
@@ -252,7 +410,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "external_beam_radiation": {
             "type": "radio",
             "label": "External beam radiation to prostate?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Clinical History & Procedure",
             "prompt_key": "External beam radiation to prostate"
@@ -260,7 +418,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "post_prostatectomy_radiation": {
             "type": "radio",
             "label": "Post-prostatectomy external beam radiation?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Clinical History & Procedure",
             "prompt_key": "Post-prostatectomy external beam radiation"
@@ -268,7 +426,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "brachytherapy": {
             "type": "radio",
             "label": "Brachytherapy to prostate?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Clinical History & Procedure",
             "prompt_key": "Brachytherapy to prostate"
@@ -276,7 +434,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "androgen_deprivation": {
             "type": "radio",
             "label": "Androgen deprivation therapy?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Clinical History & Procedure",
             "prompt_key": "Androgen deprivation therapy"
@@ -284,7 +442,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "arpi": {
             "type": "radio",
             "label": "ARPI (i.e., abiraterone)?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Clinical History & Procedure",
             "prompt_key": "ARPI (i.e., abiraterone)"
@@ -292,7 +450,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "chemotherapy": {
             "type": "radio",
             "label": "Chemotherapy?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Clinical History & Procedure",
             "prompt_key": "Chemotherapy"
@@ -339,7 +497,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "ct_type": {
             "type": "radio",
             "label": "Accompanying CT",
-            "options": ["Attenuation Correction Only", "Diagnostic with contrast", "Diagnostic without contrast"],
+            "options": ("Attenuation Correction Only", "Diagnostic with contrast", "Diagnostic without contrast"),
             "default": "Attenuation Correction Only",
             "section": "Accompanying CT",
             "prompt_key": "Accompanying CT"
@@ -356,7 +514,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "liver_lesion": {
             "type": "radio",
             "label": "Liver lesion present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Background Reference Uptake",
             "prompt_key": "Liver lesion present"
@@ -371,7 +529,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "blood_pool_lesion": {
             "type": "radio",
             "label": "Blood pool lesion present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Background Reference Uptake",
             "prompt_key": "Blood pool lesion present"
@@ -386,7 +544,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "other_lesion": {
             "type": "radio",
             "label": "Other lesion present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Background Reference Uptake",
             "prompt_key": "Other lesion present"
@@ -396,7 +554,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "prostate_lesions": {
             "type": "radio",
             "label": "Prostate Gland: Lesion(s) present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Prostate Gland",
             "prompt_key": "Prostate Gland lesions"
@@ -420,7 +578,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "prostate_localization": {
             "type": "multiselect",
             "label": "Localization",
-            "options": ["Left", "Right", "Base", "Mid", "Apical", "Anterior", "Posterior"],
+            "options": PROSTATE_LOCATIONS,
             "default": [],
             "section": "Prostate Gland",
             "prompt_key": "Prostate Gland localization",
@@ -431,7 +589,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "prostate_bed_lesions": {
             "type": "radio",
             "label": "Prostate Bed: Lesion(s) present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Prostate Bed (Post-Prostatectomy)",
             "prompt_key": "Prostate Bed lesions"
@@ -455,7 +613,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "prostate_bed_localization": {
             "type": "multiselect",
             "label": "Localization",
-            "options": ["Left", "Right", "Base", "Mid", "Apical", "Anterior", "Posterior"],
+            "options": PROSTATE_LOCATIONS,
             "default": [],
             "section": "Prostate Bed (Post-Prostatectomy)",
             "prompt_key": "Prostate Bed localization",
@@ -466,7 +624,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "seminal_vesicles_lesions": {
             "type": "radio",
             "label": "Seminal Vesicles: Lesion(s) present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Seminal Vesicles",
             "prompt_key": "Seminal Vesicles lesions"
@@ -490,7 +648,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "seminal_vesicles_localization": {
             "type": "multiselect",
             "label": "Localization",
-            "options": ["Left", "Right"],
+            "options": ("Left", "Right"),
             "default": [],
             "section": "Seminal Vesicles",
             "prompt_key": "Seminal Vesicles localization",
@@ -501,324 +659,31 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "pelvic_ln_lesions": {
             "type": "radio",
             "label": "Pelvic LN(s): Lesion(s) present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Pelvic LN(s)",
             "prompt_key": "Pelvic LN lesions"
         },
         
-        # External Iliac
-        "external_iliac_lesion": {
-            "type": "radio",
-            "label": "External Iliac: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "External Iliac lesion",
-            "dependency": {"field": "pelvic_ln_lesions", "value": "Yes"}
-        },
-        "external_iliac_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "External Iliac size and SUVmax",
-            "dependency": {"field": "external_iliac_lesion", "value": "Yes"}
-        },
-        "external_iliac_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "External Iliac notes",
-            "dependency": {"field": "external_iliac_lesion", "value": "Yes"}
-        },
-        
-        # Internal Iliac
-        "internal_iliac_lesion": {
-            "type": "radio",
-            "label": "Internal Iliac: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Internal Iliac lesion",
-            "dependency": {"field": "pelvic_ln_lesions", "value": "Yes"}
-        },
-        "internal_iliac_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Internal Iliac size and SUVmax",
-            "dependency": {"field": "internal_iliac_lesion", "value": "Yes"}
-        },
-        "internal_iliac_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Internal Iliac notes",
-            "dependency": {"field": "internal_iliac_lesion", "value": "Yes"}
-        },
-        
-        # Obturator
-        "obturator_lesion": {
-            "type": "radio",
-            "label": "Obturator: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Obturator lesion",
-            "dependency": {"field": "pelvic_ln_lesions", "value": "Yes"}
-        },
-        "obturator_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Obturator size and SUVmax",
-            "dependency": {"field": "obturator_lesion", "value": "Yes"}
-        },
-        "obturator_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Obturator notes",
-            "dependency": {"field": "obturator_lesion", "value": "Yes"}
-        },
-        
-        # Common iliac
-        "common_iliac_lesion": {
-            "type": "radio",
-            "label": "Common iliac: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Common iliac lesion",
-            "dependency": {"field": "pelvic_ln_lesions", "value": "Yes"}
-        },
-        "common_iliac_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Common iliac size and SUVmax",
-            "dependency": {"field": "common_iliac_lesion", "value": "Yes"}
-        },
-        "common_iliac_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Common iliac notes",
-            "dependency": {"field": "common_iliac_lesion", "value": "Yes"}
-        },
-        
-        # Perirectal
-        "perirectal_lesion": {
-            "type": "radio",
-            "label": "Perirectal: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Perirectal lesion",
-            "dependency": {"field": "pelvic_ln_lesions", "value": "Yes"}
-        },
-        "perirectal_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Perirectal size and SUVmax",
-            "dependency": {"field": "perirectal_lesion", "value": "Yes"}
-        },
-        "perirectal_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Perirectal notes",
-            "dependency": {"field": "perirectal_lesion", "value": "Yes"}
-        },
-        
-        # Presacral
-        "presacral_lesion": {
-            "type": "radio",
-            "label": "Presacral: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Presacral lesion",
-            "dependency": {"field": "pelvic_ln_lesions", "value": "Yes"}
-        },
-        "presacral_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Presacral size and SUVmax",
-            "dependency": {"field": "presacral_lesion", "value": "Yes"}
-        },
-        "presacral_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Presacral notes",
-            "dependency": {"field": "presacral_lesion", "value": "Yes"}
-        },
-        
-        # Other Pelvic LN
-        "other_pelvic_ln_lesion": {
-            "type": "radio",
-            "label": "Other Pelvic LN: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Other Pelvic LN lesion",
-            "dependency": {"field": "pelvic_ln_lesions", "value": "Yes"}
-        },
-        "other_pelvic_ln_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Other Pelvic LN size and SUVmax",
-            "dependency": {"field": "other_pelvic_ln_lesion", "value": "Yes"}
-        },
-        "other_pelvic_ln_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Pelvic LN(s)",
-            "prompt_key": "Other Pelvic LN notes",
-            "dependency": {"field": "other_pelvic_ln_lesion", "value": "Yes"}
-        },
+        **_lymph_node_fields("Pelvic LN(s)", "pelvic_ln_lesions", PELVIC_LN_STATIONS),
         
         # Extra-pelvic LN(s)
         "extra_pelvic_ln_lesions": {
             "type": "radio",
             "label": "Extra-pelvic LN(s): Lesion(s) present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Extra-pelvic LN(s)",
             "prompt_key": "Extra-pelvic LN lesions"
         },
         
-        # Abdominal
-        "abdominal_lesion": {
-            "type": "radio",
-            "label": "Abdominal: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Abdominal lesion",
-            "dependency": {"field": "extra_pelvic_ln_lesions", "value": "Yes"}
-        },
-        "abdominal_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Abdominal size and SUVmax",
-            "dependency": {"field": "abdominal_lesion", "value": "Yes"}
-        },
-        "abdominal_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Abdominal notes",
-            "dependency": {"field": "abdominal_lesion", "value": "Yes"}
-        },
-        
-        # Thoracic
-        "thoracic_lesion": {
-            "type": "radio",
-            "label": "Thoracic: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Thoracic lesion",
-            "dependency": {"field": "extra_pelvic_ln_lesions", "value": "Yes"}
-        },
-        "thoracic_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Thoracic size and SUVmax",
-            "dependency": {"field": "thoracic_lesion", "value": "Yes"}
-        },
-        "thoracic_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Thoracic notes",
-            "dependency": {"field": "thoracic_lesion", "value": "Yes"}
-        },
-        
-        # Supraclavicular
-        "supraclavicular_lesion": {
-            "type": "radio",
-            "label": "Supraclavicular: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Supraclavicular lesion",
-            "dependency": {"field": "extra_pelvic_ln_lesions", "value": "Yes"}
-        },
-        "supraclavicular_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Supraclavicular size and SUVmax",
-            "dependency": {"field": "supraclavicular_lesion", "value": "Yes"}
-        },
-        "supraclavicular_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Supraclavicular notes",
-            "dependency": {"field": "supraclavicular_lesion", "value": "Yes"}
-        },
-        
-        # Other Extra-pelvic LN
-        "other_extra_pelvic_ln_lesion": {
-            "type": "radio",
-            "label": "Other Extra-pelvic LN: Lesion present?",
-            "options": ["Yes", "No", "Unknown"],
-            "default": "Unknown",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Other Extra-pelvic LN lesion",
-            "dependency": {"field": "extra_pelvic_ln_lesions", "value": "Yes"}
-        },
-        "other_extra_pelvic_ln_size_suv": {
-            "type": "text",
-            "label": "Size & SUVmax",
-            "default": "",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Other Extra-pelvic LN size and SUVmax",
-            "dependency": {"field": "other_extra_pelvic_ln_lesion", "value": "Yes"}
-        },
-        "other_extra_pelvic_ln_notes": {
-            "type": "text",
-            "label": "Notes",
-            "default": "",
-            "section": "Extra-pelvic LN(s)",
-            "prompt_key": "Other Extra-pelvic LN notes",
-            "dependency": {"field": "other_extra_pelvic_ln_lesion", "value": "Yes"}
-        },
+        **_lymph_node_fields("Extra-pelvic LN(s)", "extra_pelvic_ln_lesions", EXTRA_PELVIC_LN_STATIONS),
         
         # Skeletal/Bone Metastases
         "skeletal_lesions": {
             "type": "radio",
             "label": "Skeletal/Bone Metastases: Lesion(s) present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Skeletal/Bone Metastases",
             "prompt_key": "Skeletal lesions"
@@ -826,7 +691,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "skeletal_lesion_count": {
             "type": "radio",
             "label": "Number of lesions",
-            "options": ["0", "1", "2-4", "5+"],
+            "options": ("0", "1", "2-4", "5+"),
             "default": "0",
             "section": "Skeletal/Bone Metastases",
             "prompt_key": "Skeletal number of lesions",
@@ -835,7 +700,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "bone_marrow_involvement": {
             "type": "radio",
             "label": "Bone marrow involvement",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Skeletal/Bone Metastases",
             "prompt_key": "Bone marrow involvement",
@@ -854,7 +719,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "visceral_lesions": {
             "type": "radio",
             "label": "Visceral Metastases: Lesion(s) present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "Visceral Metastases",
             "prompt_key": "Visceral lesions"
@@ -862,7 +727,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "visceral_localization": {
             "type": "multiselect",
             "label": "Localization",
-            "options": ["Lung", "Liver", "Brain", "Other"],
+            "options": ("Lung", "Liver", "Brain", "Other"),
             "default": [],
             "section": "Visceral Metastases",
             "prompt_key": "Visceral localization",
@@ -889,7 +754,7 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
         "psma_negative_lesions": {
             "type": "radio",
             "label": "PSMA-negative lesions noted on CT: Lesion(s) present?",
-            "options": ["Yes", "No", "Unknown"],
+            "options": YES_NO_UNKNOWN,
             "default": "Unknown",
             "section": "PSMA-negative lesions",
             "prompt_key": "PSMA-negative lesions"
@@ -968,6 +833,17 @@ def initialize_form_fields() -> Dict[str, Dict[str, Any]]:
             "prompt_key": "Summary"
         }
     }
+    
+    # Precompute the position of each radio option and the option set of each multiselect,
+    # so rendering needs no list scans, and bind the report formatter of each field
+    for field_info in fields.values():
+        field_info["format"] = FIELD_FORMATTERS.get(field_info["type"], str)
+        if field_info["type"] == "radio":
+            field_info["option_index"] = {option: i for i, option in enumerate(field_info["options"])}
+        elif field_info["type"] == "multiselect":
+            field_info["option_set"] = frozenset(field_info["options"])
+    # The schema is constant for the lifetime of the process, so hand it out read-only
+    return MappingProxyType({key: MappingProxyType(field_info) for key, field_info in fields.items()})
 
 def main():
     st.set_page_config(page_title="PSMA PET/CT Report", layout="wide")
@@ -1007,52 +883,70 @@ def main():
     st.header("Export Options")
     col1, col2 = st.columns(2)
     
+    # One timestamp per run, shared by the file names and the report header
+    now = datetime.datetime.now()
+    file_stamp = now.strftime('%Y%m%d_%H%M%S')
+    
+    pretty_json = col1.checkbox("Pretty-print JSON", value=False)
     if col1.button("Export as JSON"):
-        data = {k: get_field_value(k) for k in form_fields.keys()}
+        form_state = dict(st.session_state.form_state)
+        data = {k: form_state.get(k) for k in form_fields.keys()}
+        # Compact separators unless an indented file is requested
+        if pretty_json:
+            json_text = json.dumps(data, indent=2, default=str)
+        else:
+            json_text = json.dumps(data, separators=(",", ":"), default=str)
         st.download_button(
             "Download JSON",
-            data=json.dumps(data, indent=2, default=str),
-            file_name=f"report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            data=json_text,
+            file_name=f"report_{file_stamp}.json",
             mime="application/json"
         )
     
     if col2.button("Export as Text"):
-        text = generate_text_report(form_fields)
+        text = generate_text_report(form_fields, now)
         st.download_button(
             "Download Text",
             data=text,
-            file_name=f"report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+            file_name=f"report_{file_stamp}.txt",
             mime="text/plain"
         )
 
-def generate_text_report(form_fields: Dict[str, Dict[str, Any]]) -> str:
-    """Generate text report from form state"""
-    lines = [
-        "PSMA PET/CT STRUCTURED REPORT",
-        f"Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        "=" * 50,
-        ""
-    ]
+def generate_text_report(form_fields: Dict[str, Dict[str, Any]], generated: Optional[datetime.datetime] = None) -> str:
+    """Generate text report from form state; generated is the timestamp written in the header (default: now)"""
+    if generated is None:
+        generated = datetime.datetime.now()
     
-    sections = set(field["section"] for field in form_fields.values())
-    for section in sorted(sections):
-        lines.extend([f"\n{section.upper()}", "-" * len(section)])
-        
-        section_fields = {k: v for k, v in form_fields.items() if v["section"] == section}
-        for field_key, field_info in section_fields.items():
-            value = get_field_value(field_key)
+    # Write the report straight into one buffer, every line terminated by a newline
+    buf = io.StringIO()
+    buf.write("PSMA PET/CT STRUCTURED REPORT\n")
+    buf.write(f"Generated: {generated.strftime('%Y-%m-%d %H:%M:%S')}\n")
+    buf.write("=" * 50)
+    buf.write("\n\n")
+    
+    # Snapshot the form state once instead of going through session_state for every field
+    form_state = dict(st.session_state.form_state)
+    
+    for section, section_fields in sections_of(form_fields):
+        buf.write(f"\n{section.upper()}\n")
+        buf.write("-" * len(section))
+        buf.write("\n")
+        
+        # Every field with a value is reported, including fields hidden in the form, so that the
+        # text export keeps all extracted findings, like the JSON export
+        for field_key, field_info in section_fields:
+            label = field_info["label"]
+            value = form_state.get(field_key)
             if value:
-                if isinstance(value, list):
-                    value_str = ", ".join(map(str, value))
-                elif isinstance(value, datetime.date):
-                    value_str = value.strftime("%Y-%m-%d")
-                else:
-                    value_str = str(value)
-                    
+                value_str = field_info["format"](value)
                 if value_str.strip():
-                    lines.append(f"{field_info['label']}: {value_str}")
+                    buf.write(label)
+                    buf.write(": ")
+                    buf.write(value_str)
+                    buf.write("\n")
     
-    return "\n".join(lines)
+    # Drop the newline terminating the last line
+    return buf.getvalue()[:-1]
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import pytest
+
+# The parser lives next to the model loading code, which needs torch and transformers
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from main_text_input_process import parse_yes_no
+
+
+@pytest.mark.parametrize("response, expected", [
+    ("Yes", "Yes"),
+    ("yes, lesions are present", "Yes"),
+    ("Lesions are present", "Yes"),
+    ("Positive", "Yes"),
+    ("No", "No"),
+    ("Absent", "No"),
+    ("not present", "No"),
+    ("No lesion present", "No"),
+    ("Lesions are not present", "No"),
+    ("There is no evidence of lesions", "No"),
+    ("Not detected", "No"),
+    ("Lesions are present, not in the bone", "Yes"),
+    ("Positive; none elsewhere", "Yes"),
+    ("Confirmed. No further lesions.", "Yes"),
+    ("Unclear from the provided information", None),
+])
+def test_parse_yes_no(response, expected):
+    assert parse_yes_no(response) == expected